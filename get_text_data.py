@@ -16,7 +16,8 @@ frequency distribution.
 @since: 5:10 PM on Jan 8, 2013
 '''
 
-import time, re, glob, requests, json, copy, logging
+import time, re, glob, requests, json, logging, os, tempfile, heapq, argparse
+import multiprocessing
 from collections import defaultdict
 from utilities import read_api_key
 
@@ -104,7 +105,7 @@ def get_unigram_corpus():
             int(l.strip().split('\t')[1])
     return freqdist_unigrams
     
-def make_hashtag_corpus(hashtag,termlist,freqdist_unigrams):
+def make_hashtag_corpus(hashtag,termlist,freqdist_unigrams,sortedkeys=None):
     """Produces a hashtag-centric variant of unigrams.txt that weights the
     terms associated with that hashtag."""
     #make a frequency distribution of terms associated with the supplied hashtag 
@@ -113,49 +114,96 @@ def make_hashtag_corpus(hashtag,termlist,freqdist_unigrams):
     
     ratio = \
     sum(freqdist_unigrams.itervalues())/sum(freqdist_hashtag.itervalues())  #normalizing factor
-    new = copy.deepcopy(freqdist_unigrams)    #updated dict that combines pertinent k,v from hashtags with the majority of unigrams
+    new = {}    #only the pertinent k,v from hashtags; the majority of unigrams are read straight from freqdist_unigrams
     
     for k in freqdist_hashtag.keys():
-        #for tokens common to the unigrams and hashtag corpora:
-        #if the count of a token from unigrams.txt is lower than the normalized count
-        #of that token in the hashtag corpus, update new with normalized hashtag count
-        if k in new.keys() and \
-        new[k] < int(round(ratio*freqdist_hashtag.get(k))):
-            new[k] = int(round(ratio*freqdist_hashtag.get(k)))
-        #for tokens in the new hashtag corpus that don't exist in the unigrams corpus,
+        #for tokens common to the unigrams and hashtag corpora, as well as for 
+        #tokens in the new hashtag corpus that don't exist in the unigrams corpus,
         #assign the normalized value from the hashtag corpus
-        else:
-            new[k] = int(round(ratio*freqdist_hashtag.get(k)))
-    #tokens found in unigrams but not hashtags already exist in new at their proper ratio. 
-    #make the new corpus text file from the accumulated tokens and their counts in new
+        new[k] = int(round(ratio*freqdist_hashtag.get(k)))
+    #tokens found in unigrams but not hashtags are taken from freqdist_unigrams at their proper ratio. 
+    #make the new corpus text file from the accumulated tokens and their counts
+    if sortedkeys is None:
+        sortedkeys = sorted(freqdist_unigrams.iterkeys())
+    newkeys = sorted(k for k in new if k not in freqdist_unigrams)
     myfile = str(hashtag)+'.txt'
-    with open('corpora/tweets/'+myfile, 'w+') as f:
-        for k,v in sorted(new.items(), key=lambda tup: tup[0]):
-            try:
-                print >> f, k+'\t'+str(v)
-            except UnicodeEncodeError:
-                pass
+    #write to a temporary file in the target directory and rename it into place
+    #so that a half-written corpus is never picked up by init_database.py or segext.py
+    fd, tmpname = tempfile.mkstemp(prefix='.'+myfile, dir='corpora/tweets')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            for k in heapq.merge(sortedkeys, newkeys):
+                try:
+                    print >> f, k+'\t'+str(new.get(k, freqdist_unigrams.get(k)))
+                except UnicodeEncodeError:
+                    pass
+        os.chmod(tmpname, 0o644)     #mkstemp creates the file owner-only
+        os.rename(tmpname, 'corpora/tweets/'+myfile)
+    except:
+        os.remove(tmpname)
+        raise
+
+#base distribution shared by the worker processes of build_hashtag_corpora. It 
+#is set in the parent before the pool is created, so forked workers read it 
+#copy-on-write instead of receiving a pickled or deep-copied dict per job.
+shared_unigrams = None
+shared_sortedkeys = None
+
+def build_hashtag_corpus(hashtag):
+    """Retrieves text for a single hashtag and makes its corpus from the shared
+    base distribution. Returns the hashtag and whether a corpus was written."""
+    logging.info('Retrieving text for '+str(hashtag)+' ...')
+    termlist = retrieve_text(hashtag)
+    if len(termlist) == 0:
+        logging.info('Hashtag corpus for '+str(hashtag)+\
+                     ' discarded due to lack of data.')
+        return hashtag, False
+    logging.info('Making corpus for '+str(hashtag)+' beginning at '\
+    +time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
+    make_hashtag_corpus(hashtag,termlist,shared_unigrams,shared_sortedkeys)
+    return hashtag, True
+
+def build_hashtag_corpora(hashtaglist, unigrams, processes=1):
+    """Builds corpora for each hashtag in hashtaglist, using a pool of 
+    processes if more than one is requested."""
+    global shared_unigrams, shared_sortedkeys
+    shared_unigrams = unigrams
+    shared_sortedkeys = sorted(unigrams.iterkeys())     #sorted once, not once per hashtag
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(build_hashtag_corpus, hashtaglist, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [build_hashtag_corpus(hashtag) for hashtag in hashtaglist]
+    built = sum(1 for hashtag, ok in results if ok)
+    logging.info(str(built)+' of '+str(len(hashtaglist))+\
+                 ' hashtag corpora built.')
+    return results
     
-def main():
+p = argparse.ArgumentParser(description="get_text_data.py")
+p.add_argument("-p", "--processes", type=int, default=1)
+p.add_argument("-f", "--infile", help="file of hashtags, one per line")
+
+def main(processes=1, infile=None):
     logging.info('Started get_text_data.py at '+\
     time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
     logging.info('Retrieving hashtags...')
-    #hashtaglist = retrieve_hashtags()
-    hashtaglist = ['#SanDiego']    #use for one-off tests
+    if infile:
+        with open(infile, 'r') as f:
+            hashtaglist = [line.strip() for line in f if line.strip()]
+    else:
+        hashtaglist = retrieve_hashtags()
     logging.info('Building gold standard corpus...')
     unigrams = get_unigram_corpus()
-    logging.info('Building hashtag corpora...')
-    for hashtag in hashtaglist:
-        logging.info('Retrieving text for '+str(hashtag)+' ...')
-        termlist = retrieve_text(hashtag)
-        if len(termlist) == 0:
-            logging.info('Hashtag corpus discarded due to lack of data.')
-        else:
-            logging.info('Making corpus for '+str(hashtag)+' beginning at '\
-            +time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
-            make_hashtag_corpus(hashtag,termlist,unigrams)
+    logging.info('Building hashtag corpora with '+str(processes)+\
+                 ' process(es)...')
+    build_hashtag_corpora(hashtaglist, unigrams, processes)
     logging.info('Done at '+time.strftime("%d %b %Y %H:%M:%S", \
                                           time.localtime()))
 
 if __name__ == '__main__':
-    main()
+    args = p.parse_args()
+    main(args.processes, args.infile)
@@ -13,6 +13,7 @@ created by get_text_data.py.
 '''
 
 import sqlite3, time, os, logging
+from utilities import get_lattice
 
 log = time.strftime('./logs/'+'%H:%M:%S %d %b %Y', time.localtime())+'.log'
 
@@ -45,15 +46,27 @@ def setup_db(dbname='hashtags.db'):
     else:
         conn = sqlite3.connect(str(dbname))
         curs = conn.cursor()
+    #inverted index from each word of a row's candidate lattice to the row, 
+    #used by resegment.py to find the rows affected by a corpus update
+    curs.execute("""CREATE TABLE IF NOT EXISTS tblLattice (word TEXT, \
+        UID INTEGER, PRIMARY KEY (word, UID))""")
+    conn.commit()
 
 def populate_db(path='/home/brandon/code/segmenter/corpora/tweets'):
     """Pulls hashtags out of the files created by get_text_data.py."""
     for f in os.listdir(path):
         if f.endswith('.txt'):
+            hashtag = f.replace('.txt','')
             curs.execute("""INSERT INTO tblHashtags (UID, 'text.original') \
-            VALUES (null, ?)""",(f.replace('.txt',''),))
+            VALUES (null, ?)""",(hashtag,))
+            index_row(curs.lastrowid, hashtag)
     conn.commit()
 
+def index_row(uid, text):
+    """Records the words of the candidate lattice of text against uid."""
+    curs.executemany("""INSERT OR IGNORE INTO tblLattice (word, UID) \
+    VALUES (?, ?)""", ((word, uid) for word in get_lattice(text)))
+
 def main():
     logging.info('Started init_database.py at '+\
     time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
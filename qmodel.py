@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+'''
+qmodel module
+
+This module reads and writes the pruned, quantized unigram models produced by
+shrink_model.py. A model file is a header line, one line per word length
+giving the backoff floor for unknown words of that length, and then one
+word\tcode line per word, where code is the word's log-probability quantized
+to 8 or 16 bits.
+
+@author: Brandon Devine
+@contact: brandon.devine@gmail.com
+@since: 2:05 PM on Feb 9, 2013
+'''
+
+import math
+
+class QPdist(dict):
+    '''A probability distribution read from a quantized model. Words map to
+    codes and codes index a table of probabilities, so a lookup needs no
+    division and the codes are shared int objects rather than one per word.'''
+    def __init__(self, data=[], bits=8, lo=0., hi=0., N=1., floors=None):
+        step = (hi-lo)/(2**bits-1)
+        self.table = [10**(lo+code*step) for code in range(2**bits)]
+        self.bits, self.lo, self.hi = bits, lo, hi
+        self.N = float(N)
+        self.floors = floors or {}
+        codes = range(2**bits)      #reuse the same int objects for every word
+        for key,code in data:
+            self[key] = codes[int(code)]
+    def __call__(self, key):
+        if key in self: return self.table[self[key]]
+        else: return self.unkfn(key)
+    def unkfn(self, key):
+        '''Estimates the probability of an unknown word: segbase's heuristic,
+        raised to the floor that holds the mass of the pruned words.'''
+        return max(10./(self.N * 10**len(key)), self.floors.get(len(key), 0.))
+
+def quantize(p, bits, lo, hi):
+    '''Returns the code of probability p on a log10 scale from lo to hi.'''
+    if hi == lo: return 0
+    code = int(round((math.log10(p)-lo)/(hi-lo)*(2**bits-1)))
+    return min(max(code, 0), 2**bits-1)
+
+def write_model(name, counts, N, bits=8, floors=None):
+    '''Writes counts as a quantized model with total N to file name.'''
+    floors = floors or {}
+    logps = [math.log10(c/float(N)) for c in counts.itervalues()]
+    lo, hi = (min(logps), max(logps)) if logps else (0., 0.)
+    with open(name, 'w') as f:
+        print >> f, '\t'.join(['!model', str(bits), repr(lo), repr(hi),
+                               repr(float(N)), str(len(floors))])
+        for length,floor in sorted(floors.items()):
+            print >> f, '\t'.join(['!floor', str(length), repr(floor)])
+        for k,c in sorted(counts.items()):
+            print >> f, k+'\t'+str(quantize(c/float(N), bits, lo, hi))
+
+def read_model(name):
+    '''Reads a model written by write_model into a QPdist.'''
+    with open(name, 'r') as f:
+        header = f.readline().rstrip('\n').split('\t')
+        if header[0] != '!model':
+            raise ValueError(name+' is not a quantized model.')
+        bits, lo, hi, N = int(header[1]), float(header[2]), \
+        float(header[3]), float(header[4])
+        floors = {}
+        for i in range(int(header[5])):
+            tag, length, floor = f.readline().rstrip('\n').split('\t')
+            floors[int(length)] = float(floor)
+        data = (line.rstrip('\n').split('\t') for line in f)
+        return QPdist(data, bits, lo, hi, N, floors)
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+'''
+resegment module
+
+This module compares an old and a new version of a corpus (unigrams.txt or one
+of the hashtag corpora created by get_text_data.py) and clears the
+segmentations of only those rows of hashtags.db whose result may change. The
+rows are found through tblLattice, an inverted index from every word of a
+row's candidate lattice to the row's UID. Running segbase.py or segext.py
+afterwards re-segments the cleared rows, since both only pick up NULL columns.
+
+@author: Brandon Devine
+@contact: brandon.devine@gmail.com
+@since: 4:20 PM on Feb 2, 2013
+'''
+
+import argparse, sqlite3, os, sys, time, logging
+from utilities import datafile, get_lattice
+
+log = time.strftime('./logs/'+'%H:%M:%S %d %b %Y', time.localtime())+'.log'
+
+formatter = logging.Formatter('%(asctime)s %(message)s', '%H:%M:%S %d %b %Y')
+handler = logging.FileHandler(log)
+handler.setFormatter(formatter)
+logger = logging.getLogger()
+logger.addHandler(handler)
+logger.setLevel(logging.DEBUG)
+
+def get_counts(corpus):
+    """Reads a corpus file into a dictionary of token counts."""
+    return dict((k, int(v)) for k,v in datafile(corpus))
+
+def get_changed_words(old, new, L=20):
+    """Returns the words whose counts differ between two corpora, including
+    words that were added or removed. Words longer than L never appear in a
+    lattice and are left out."""
+    changed = set(k for k in old if old[k] != new.get(k))
+    changed.update(k for k in new if k not in old)
+    return set(k for k in changed if len(k) <= L)
+
+def index_rows(curs):
+    """Adds the lattice of every row that has no entries in tblLattice yet, so
+    databases created before the index existed can be brought up to date."""
+    curs.execute("""CREATE TABLE IF NOT EXISTS tblLattice (word TEXT, \
+        UID INTEGER, PRIMARY KEY (word, UID))""")
+    curs.execute("""SELECT UID, "text.original" FROM tblHashtags WHERE UID \
+        NOT IN (SELECT DISTINCT UID FROM tblLattice)""")
+    rows = curs.fetchall()
+    for uid, text in rows:
+        curs.executemany("""INSERT OR IGNORE INTO tblLattice (word, UID) \
+        VALUES (?, ?)""", ((word, uid) for word in get_lattice(text)))
+    return len(rows)
+
+def get_affected_rows(curs, words, hashtag=None):
+    """Returns the UIDs of the rows whose lattice contains any of words,
+    optionally restricted to the rows of a single hashtag."""
+    curs.execute('CREATE TEMP TABLE IF NOT EXISTS tmpChanged (word TEXT)')
+    curs.execute('DELETE FROM tmpChanged')
+    curs.executemany('INSERT INTO tmpChanged (word) VALUES (?)',
+                     ((w,) for w in words))
+    if hashtag is None:
+        curs.execute("""SELECT DISTINCT l.UID FROM tblLattice l \
+            JOIN tmpChanged c ON l.word = c.word""")
+    else:
+        curs.execute("""SELECT DISTINCT l.UID FROM tblLattice l \
+            JOIN tmpChanged c ON l.word = c.word \
+            JOIN tblHashtags h ON h.UID = l.UID \
+            WHERE h."text.original" = ?""", (hashtag,))
+    return [r[0] for r in curs.fetchall()]
+
+def clear_segs(curs, uids, column):
+    """Sets the given segmentation column to NULL for each of uids."""
+    curs.executemany('UPDATE tblHashtags SET "'+column+'" = NULL \
+        WHERE "UID" = ?', ((uid,) for uid in uids))
+
+p = argparse.ArgumentParser(description="resegment.py")
+p.add_argument("-o", "--old", help="corpus the table was segmented with")
+p.add_argument("-n", "--new", help="updated corpus")
+p.add_argument("-e", "--ext", action="store_true",
+               help="the corpora are hashtag corpora used by segext.py")
+p.add_argument("-i", "--index", action="store_true",
+               help="only add missing rows to the lattice index")
+
+args = p.parse_args()
+
+def main():
+    logging.info('Started resegment.py at '+\
+    time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
+    pathname = os.path.abspath('')
+    if os.path.exists(pathname+'/hashtags.db') == False:
+        logging.info('Please ensure that hashtags.db is in the \
+            current directory.')
+        sys.exit(1)
+    conn = sqlite3.connect('hashtags.db')
+    curs = conn.cursor()
+    logging.info('Indexing rows...')
+    logging.info('%s rows added to the lattice index.', index_rows(curs))
+    conn.commit()
+    if args.index or not (args.old and args.new):
+        return
+    old = get_counts(args.old)
+    new = get_counts(args.new)
+    changed = get_changed_words(old, new)
+    logging.info('%s words changed between %s and %s.', len(changed),
+                 args.old, args.new)
+    if args.ext:
+        #segext.py takes N from the sum of the hashtag corpus, so if that moves
+        #every row of the hashtag is affected, not only those with changed words
+        column = 'text.seg.ext'
+        hashtag = os.path.basename(args.new).replace('.txt','')
+        if sum(old.itervalues()) != sum(new.itervalues()):
+            curs.execute('SELECT UID FROM tblHashtags WHERE \
+                "text.original" = ?', (hashtag,))
+            uids = [r[0] for r in curs.fetchall()]
+        else:
+            uids = get_affected_rows(curs, changed, hashtag)
+    else:
+        #segbase.py uses a fixed N, so only rows with changed words are affected
+        column = 'text.seg.basic'
+        uids = get_affected_rows(curs, changed)
+    clear_segs(curs, uids, column)
+    conn.commit()
+    curs.execute('SELECT COUNT(*) FROM tblHashtags')
+    total = curs.fetchone()[0]
+    logging.info('Cleared "%s" for %s of %s rows (%0.2f%%).', column,
+                 len(uids), total, 100.0*len(uids)/max(total, 1))
+    logging.info('Done at '+ time.strftime("%d %b %Y %H:%M:%S", \
+                                           time.localtime()))
+
+if __name__ == '__main__':
+    main()
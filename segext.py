@@ -20,8 +20,8 @@ copies or substantial portions of the Software.
 
 segext module
 
-This module implements Peter Norvig's word segmenter and extends it by providing 
-a method by which the corpus dependency can be updated so as to allow for 
+This module runs Peter Norvig's word segmenter (see segmenter) and extends it by 
+providing a method by which the corpus dependency can be updated so as to allow for 
 segmentation of text that may be relevant to the current timeframe.
   
 @author: Brandon Devine
@@ -29,8 +29,11 @@ segmentation of text that may be relevant to the current timeframe.
 @since: 8:55:36 PM on Aug 25, 2012
 '''
 
-import argparse, operator, re, sqlite3, os, sys, time, logging
+import argparse, sqlite3, os, sys, time, logging
 from collections import defaultdict
+import segmenter
+from segmenter import Pdist, get_unk_word_prob, get_datafile, get_segs_within
+from qmodel import read_model
 
 log = time.strftime('./logs/'+'%H:%M:%S %d %b %Y', time.localtime())+'.log'
 
@@ -41,68 +44,12 @@ logger = logging.getLogger()
 logger.addHandler(handler)
 logger.setLevel(logging.DEBUG)
 
-class Pdist(dict):
-    ''''A probability distribution estimated from counts in a datafile.'''
-    def __init__(self, data=[], N=1024908267229, unkfn=None):
-        for key,count in data:
-            self[key] = self.get(key, 0) + int(count)   
-        self.N = float(N or sum(self.itervalues()))      
-        self.unkfn = unkfn or (lambda key, N: 1./N)   rd
-    #an already-created instance of Pdist, when called, executes __call__. 
-    #the instance is callable like a function (meaning that Pw below can take args). 
-    def __call__(self, key):    
-        if key in self: return self[key]/self.N       
-        else: return self.unkfn(key, self.N)    
-
-def get_unk_word_prob(key, N):
-    return 10./(N * 10**len(key))       
-    
-def get_datafile(name, sep='\t'):
-    '''Reads key,value pairs from file.'''
-    for line in file(name):
-        line = line.rstrip('\n')
-        yield line.split(sep)
-    
-def get_Pwords(words): 
-    '''The Naive Bayes probability of a sequence of words.'''   
-    return get_product(Pw(w) for w in words)        
-
-def get_product(nums):
-    '''Returns the product of a sequence of numbers.'''
-    return reduce(operator.mul, nums, 1)            
-
-def get_splits(text, L=20):
-    '''Returns a list of all possible (first, remaining) pairs, \
-    len(first)<=L.'''
-    return [(text[:i+1], text[i+1:]) 
-            for i in range(min(len(text), L))]  
-    
-def memo(f):
-    '''Memoizes function f.'''
-    table = {}
-    def fmemo(*args):
-        if args not in table:
-            table[args] = f(*args)
-        return table[args]
-    fmemo.memo = table
-    return fmemo
-
-@memo
-def get_segs(text):
-    '''Returns one of a list of words that is the best segmentation of text.'''
-    if not text: return []
-    candidates = ([first]+get_segs(remaining) for \
-                  first,remaining in get_splits(text))
-    return max(candidates, key=get_Pwords)  
-
-def normalize(text):
-    '''Normalizes (hashtag) text by removing hashes and setting to lowercase.'''
-    text = text.lower()
-    text = re.sub('#', '', text)
-    return text
-
-def set_segs(data):
-    '''Handles data coming in as different formats and outputs as needed.'''
+def set_segs(data, seconds=None, ops=None, hints=False):
+    '''Handles data coming in as different formats and outputs as needed. 
+    Returns the segmentation, whether it was truncated by the budget, the 
+    number of hard boundaries applied and whether they overrode the unsplit 
+    segmentation.'''
+    truncated, boundaries, overrode = False, 0, False
     try:
         conn = sqlite3.connect('hashtags.db')
         curs = conn.cursor()
@@ -111,18 +58,18 @@ def set_segs(data):
         for row in curs:
             uid = row[0]
             inp = row[2]
-            ninp = normalize(inp)
-            segs = get_segs(ninp)
+            segs, truncated, boundaries, overrode = get_segs_within(inp, 
+                                                    seconds, ops, hints)
             data = ' '.join(segs)
             curs.execute('UPDATE tblHashtags SET "text.seg.ext" = ? WHERE \
             "UID" = ?', (data, uid))
             conn.commit()
     except:
         inp = data
-        ninp = normalize(inp)
-        segs = get_segs(ninp)
+        segs, truncated, boundaries, overrode = get_segs_within(inp, seconds, 
+                                                                ops, hints)
         data = ' '.join(segs)
-    return data
+    return data, truncated, boundaries, overrode
 
 def get_corpus_counts(corpus):
     """Translates the given corpus into a dictionary-based frequency 
@@ -137,6 +84,12 @@ def get_corpus_counts(corpus):
 p = argparse.ArgumentParser(description="segext.py")
 p.add_argument("-s", "--string")
 p.add_argument("-f", "--infile")
+p.add_argument("-t", "--timelimit", type=float, help="seconds per input")
+p.add_argument("-o", "--maxops", type=int, help="operations per input")
+p.add_argument("-b", "--hints", action="store_true",
+               help="split at case, digit and punctuation boundaries first")
+p.add_argument("-m", "--model", help="level of the hashtag models made by \
+               shrink_model.py to use instead of corpora/tweets, e.g. c100.q8")
 
 args = p.parse_args()
 
@@ -166,19 +119,37 @@ def read_input(args):
 def main():
     logging.info('Started segext.py at '+\
     time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
+    inputs = split = boundaries = overrides = 0
     for line in read_input(args):
         try:
             pathname = os.path.abspath('')
             logging.info('Input: %s', str(line))
-            N = get_corpus_counts(pathname+'/corpora/tweets/'+str(line)+'.txt')
-            logging.info('Corpus size: %s',str(N))
-            global Pw
-            Pw = Pdist(get_datafile(pathname+'/corpora/tweets/'+str(line)+\
-                        '.txt'),N, get_unk_word_prob)
-            output = set_segs(line)    
+            if args.model:
+                segmenter.Pw = read_model(pathname+'/corpora/models/'+\
+                                          str(line)+'.'+args.model+'.txt')
+                logging.info('Corpus size: %s',str(segmenter.Pw.N))
+            else:
+                N = get_corpus_counts(pathname+'/corpora/tweets/'+str(line)+\
+                                      '.txt')
+                logging.info('Corpus size: %s',str(N))
+                segmenter.Pw = Pdist(get_datafile(pathname+'/corpora/tweets/'+\
+                                     str(line)+'.txt'),N, get_unk_word_prob)
+            segmenter.get_segs.memo.clear()   #segmentations under the previous Pw are stale
+            output, truncated, found, overrode = set_segs(line, args.timelimit,
+                                                args.maxops, args.hints)
             logging.info('Output: %s', str(output))
+            if truncated:
+                logging.info('Segmentation truncated by time/operation budget.')
+            inputs += 1
+            split += found > 0
+            boundaries += found
+            overrides += overrode
         except IOError:
             pass
+    if args.hints:
+        logging.info('Boundary hints applied to %s of %s inputs (%s boundaries), '
+                     'overriding the unsplit segmentation of at least %s.',
+                     split, inputs, boundaries, overrides)
     logging.info('Done at '+ time.strftime("%d %b %Y %H:%M:%S", \
                     time.localtime()))
         
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+'''
+**********
+The MIT License (MIT)
+
+Copyright (c) 2008-2009 Peter Norvig
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of 
+this software and associated documentation files (the "Software"), to deal in 
+the Software without restriction, including without limitation the rights to 
+use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies 
+of the Software, and to permit persons to whom the Software is furnished to do 
+so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all 
+copies or substantial portions of the Software.
+**********
+
+segmenter module
+
+This module holds Peter Norvig's word segmenter as shared by segbase, segext 
+and shrink_model: the probability distribution, the memoized segmentation and 
+its bounded and boundary-hinted variants. Callers set Pw to the distribution to 
+segment with and clear get_segs.memo whenever they replace it.
+  
+@author: Brandon Devine
+@contact: brandon.devine@gmail.com
+@since: 8:55:36 PM on Nov 25, 2012
+'''
+
+import operator, re
+from utilities import Budget, get_hint_pieces
+
+class Pdist(dict):
+    '''A probability distribution estimated from counts in a datafile.'''
+    def __init__(self, data=[], N=None, unkfn=None):
+        for key,count in data:
+            self[key] = self.get(key, 0) + int(count)   #since this is being populated en masse, all vals are initially 0; hence the + int(count)
+        self.N = float(N or sum(self.itervalues()))     #if N is not supplied, back off to the sum of all values in the dict instance. 
+        self.unkfn = unkfn or (lambda key, N: 1./N)   #if unkfn is not supplied, back off to a simple estimation of an unknown word
+    #an already-created instance of Pdist, when called, executes __call__. 
+    #the instance is callable like a function (meaning that Pw below can take args). 
+    def __call__(self, key):    
+        if key in self: return self[key]/self.N     #returns the simple MLE if the calling key is in the instance's dict  
+        else: return self.unkfn(key, self.N)    #if not, back off to whatever we decided the unknown estimation method is
+
+def get_unk_word_prob(key, N):
+    '''Estimates the probability of an unknown word.'''
+    return 10./(N * 10**len(key))       #seat-of-the-pants heuristic
+
+def get_datafile(name, sep='\t'):
+    '''Reads key,value pairs from a file.'''
+    for line in file(name):
+        line = line.rstrip('\n')
+        yield line.split(sep)
+        
+N = 1024908267229   
+
+Pw = None   #the distribution in use, set by segbase, segext or shrink_model
+
+def get_Pwords(words): 
+    '''Returns the Naive Bayes probability of a sequence of words.'''   #although really, there's not much Bayesian voodoo going on
+    return get_product(Pw(w) for w in words)        #Pw can take w as arg because of defined __call__ magic method
+
+def get_product(nums):
+    '''Returns the product of a sequence of numbers.'''
+    return reduce(operator.mul, nums, 1)        #ex: with nums = [2,3,4], (((1x2)x3)x4) = 24    
+
+def get_splits(text, L=20):
+    '''Returns a list of all possible (first, remaining) pairs, \
+    len(first)<=L.'''
+    return [(text[:i+1], text[i+1:]) 
+            for i in range(min(len(text), L))]  #ex: with text = 'spark', [('s', 'park'), ('sp', 'ark'), ('spa', 'rk'), ('spar', 'k'), ('spark', '')]
+    
+def memoize(f):
+    '''Memoizes function f.'''
+    table = {}
+    def fmemo(*args):
+        if args not in table:
+            table[args] = f(*args)
+        return table[args]
+    fmemo.memo = table
+    return fmemo
+
+@memoize
+def get_segs(text):
+    '''Returns one of a list of words that is the best segmentation of text.'''
+    if not text: return []
+    candidates = ([first]+get_segs(remaining) for \
+                  first,remaining in get_splits(text))
+    return max(candidates, key=get_Pwords)
+
+def get_segs_bounded(text, budget, L=20):
+    '''Returns the best segmentation of text found within budget, and whether 
+    it was truncated. The get_segs table is filled from the end of text 
+    backwards; if the budget runs out, the longest solved suffix is completed 
+    by segmenting the prefix before it greedily, and the more probable of that 
+    and the purely greedy segmentation is returned. The work done after the 
+    budget runs out is linear in the length of text.'''
+    best = {len(text): []}
+    truncated = False
+    for i in range(len(text)-1, -1, -1):
+        if (text[i:],) in get_segs.memo:
+            best[i] = get_segs.memo[(text[i:],)]
+            continue
+        if not budget.spend(min(len(text)-i, L)):
+            truncated = True
+            break
+        candidates = ([text[i:j]]+best[j] for \
+                      j in range(i+1, min(len(text), i+L)+1))
+        best[i] = max(candidates, key=get_Pwords)
+    for i in best:      #entries are exact, so share them with get_segs
+        get_segs.memo[(text[i:],)] = best[i]
+    if not truncated:
+        return best[0], False
+    j = min(best)
+    candidates = [get_greedy_segs(text[:j], L)+best[j]]
+    if j < len(text):
+        candidates.append(get_greedy_segs(text, L))
+    return max(candidates, key=get_Pwords), True
+
+def get_greedy_segs(text, L=20):
+    '''Segments text left to right, taking the longest known word each time.'''
+    segs, i = [], 0
+    while i < len(text):
+        j = next((j for j in range(min(len(text), i+L), i, -1) \
+                  if text[i:j] in Pw), i+1)
+        segs.append(text[i:j])
+        i = j
+    return segs
+
+def get_segs_within(text, seconds=None, ops=None, hints=False):
+    '''Normalizes and segments text. Returns the segmentation, whether it was 
+    truncated, the number of hard boundaries applied, and whether a case or 
+    digit boundary certainly overrode the unsplit segmentation. The search is 
+    bounded by seconds and/or ops if either is given; with hints, text is 
+    first split with get_hint_pieces and each piece is segmented on its own.'''
+    pieces = get_hinted_pieces(text) if hints else [(normalize(text), None)]
+    budget = None if seconds is None and ops is None else Budget(seconds, ops)
+    segs, truncated, overrode = [], False, False
+    for piece,boundary in pieces:
+        if budget is None:
+            piecesegs = get_segs(piece)
+        else:
+            piecesegs, piecetruncated = get_segs_bounded(piece, budget)
+            truncated = truncated or piecetruncated
+        #joining the words either side of the boundary scores higher, so the 
+        #unsplit text would not have been segmented this way; punctuation 
+        #boundaries are left out, since there the words were never adjacent
+        if boundary and segs and piecesegs and Pw(segs[-1]+piecesegs[0]) > \
+        Pw(segs[-1])*Pw(piecesegs[0]):
+            overrode = True
+        segs = segs+piecesegs
+    return segs, truncated, max(len(pieces)-1, 0), overrode
+
+def get_hinted_pieces(text, L=20):
+    '''Returns the normalized (piece, boundary) pairs of text from 
+    get_hint_pieces, rejoining a split made on a change of case only when the 
+    joined piece is a known word of at most L letters, as in get_splits.'''
+    pieces = []
+    for piece,boundary in get_hint_pieces(text):
+        piece = normalize(piece)
+        if boundary == 'case' and pieces and \
+        len(pieces[-1][0]+piece) <= L and pieces[-1][0]+piece in Pw:
+            pieces[-1] = (pieces[-1][0]+piece, pieces[-1][1])
+        elif piece:
+            pieces.append((piece, boundary))
+    return pieces
+
+def normalize(text):
+    '''Normalizes (hashtag) text by removing hashes and setting to lowercase.'''
+    text = text.lower()
+    text = re.sub('#', '', text)
+    return text
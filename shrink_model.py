@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python
+
+'''
+shrink_model module
+
+This module makes smaller variants of a corpus (unigrams.txt or one of the
+hashtag corpora created by get_text_data.py) for the segmenters to load with
+-m. The vocabulary is pruned by minimum count or by the share of probability
+mass to keep, the pruned mass is folded into the backoff for unknown words,
+and the remaining log-probabilities are quantized to 8 or 16 bits (see qmodel).
+For each pruning level the memory footprint, load time and agreement with the
+full model's segmentations are logged.
+
+@author: Brandon Devine
+@contact: brandon.devine@gmail.com
+@since: 2:05 PM on Feb 9, 2013
+'''
+
+import argparse, sqlite3, os, sys, time, logging
+from collections import defaultdict
+import segmenter
+from segmenter import Pdist, N, get_unk_word_prob, get_datafile, \
+get_segs_within
+from qmodel import QPdist, write_model, read_model
+
+log = time.strftime('./logs/'+'%H:%M:%S %d %b %Y', time.localtime())+'.log'
+
+formatter = logging.Formatter('%(asctime)s %(message)s', '%H:%M:%S %d %b %Y')
+handler = logging.FileHandler(log)
+handler.setFormatter(formatter)
+logger = logging.getLogger()
+logger.addHandler(handler)
+logger.setLevel(logging.DEBUG)
+
+def prune_by_count(counts, mincount):
+    '''Returns the words of counts seen at least mincount times.'''
+    return dict((k,c) for k,c in counts.iteritems() if c >= mincount)
+
+def prune_by_mass(counts, mass):
+    '''Returns the most frequent words of counts that together hold the given
+    share of their total count.'''
+    kept, total, target = {}, 0, mass*sum(counts.itervalues())
+    for k,c in sorted(counts.iteritems(), key=lambda tup: -tup[1]):
+        if total >= target: break
+        kept[k] = c
+        total += c
+    return kept
+
+def get_floors(counts, kept, N):
+    '''Folds the mass of the pruned words into per-length backoff floors. The
+    pruned mass of each length is spread over all alphabetic strings of that
+    length, but never above the probability of the rarest kept word.'''
+    dropped = defaultdict(int)
+    for k,c in counts.iteritems():
+        if k not in kept: dropped[len(k)] += c
+    ceiling = min(kept.itervalues())/float(N) if kept else 1.
+    return dict((length, min(mass/(float(N)*26**length), ceiling))
+                for length,mass in dropped.iteritems())
+
+def get_footprint(pdist):
+    '''Estimates the bytes held by a distribution's dict, keys and values.'''
+    size, seen = sys.getsizeof(pdist), set()
+    for k,v in pdist.iteritems():
+        size += sys.getsizeof(k)
+        if id(v) not in seen:
+            seen.add(id(v))
+            size += sys.getsizeof(v)
+    if isinstance(pdist, QPdist):
+        size += sys.getsizeof(pdist.table)+sum(sys.getsizeof(p)
+                                                for p in pdist.table)
+    return size
+
+def get_all_segs(texts, Pw, args):
+    '''Segments each of texts with Pw through segmenter, with the same budget
+    and boundary hints that segbase and segext are run with.'''
+    segmenter.Pw = Pw
+    segmenter.get_segs.memo.clear()
+    return [get_segs_within(text, args.timelimit, args.maxops, args.hints)[0]
+            for text in texts]
+
+def get_agreement(reference, segs):
+    '''Returns the share of segmentations that agree with reference.'''
+    same = sum(1 for ref, seg in zip(reference, segs) if ref == seg)
+    return float(same)/max(len(reference), 1)
+
+def get_levels(args):
+    '''Returns (name, pruning function, argument) for each requested level.'''
+    levels = [('c'+str(c), prune_by_count, c) for c in args.mincounts]
+    levels.extend(('m'+str(m), prune_by_mass, m) for m in args.masses)
+    return levels
+
+p = argparse.ArgumentParser(description="shrink_model.py")
+p.add_argument("-c", "--corpus", default='corpora/unigrams.txt')
+p.add_argument("-e", "--ext", action="store_true",
+               help="the corpus is a hashtag corpus used by segext.py")
+p.add_argument("-m", "--mincounts", type=int, nargs='*', default=[])
+p.add_argument("-k", "--masses", type=float, nargs='*', default=[],
+               help="share of probability mass to keep, e.g. 0.99")
+p.add_argument("-q", "--bits", type=int, choices=[8, 16], default=8)
+p.add_argument("-f", "--infile", help="hashtags to measure agreement on")
+p.add_argument("-t", "--timelimit", type=float, help="seconds per input")
+p.add_argument("-o", "--maxops", type=int, help="operations per input")
+p.add_argument("-b", "--hints", action="store_true",
+               help="split at case, digit and punctuation boundaries first")
+p.add_argument("-d", "--outdir", default='corpora/models')
+
+args = p.parse_args()
+
+def read_texts(args):
+    '''Reads the hashtags used to measure agreement. With -e, only the rows of
+    the hashtag whose corpus is being shrunk are read from hashtags.db.'''
+    if args.infile:
+        with open(args.infile,'r') as f:
+            return [line.rstrip("\n") for line in f]
+    elif os.path.exists(os.path.abspath('')+'/hashtags.db'):
+        conn = sqlite3.connect('hashtags.db')
+        curs = conn.cursor()
+        if args.ext:
+            curs.execute('SELECT "text.original" FROM tblHashtags WHERE \
+                "text.original" = ?', 
+                (os.path.basename(args.corpus).replace('.txt',''),))
+        else:
+            curs.execute('SELECT "text.original" FROM tblHashtags')
+        return [str(r[0]) for r in curs.fetchall()]
+    else:
+        return []
+
+def main():
+    logging.info('Started shrink_model.py at '+\
+    time.strftime("%d %b %Y %H:%M:%S", time.localtime()))
+    t1 = time.time()
+    full = Pdist(get_datafile(args.corpus), None if args.ext else N, 
+                 get_unk_word_prob)
+    t2 = time.time()
+    logging.info('Full model: %s words, %0.1f MB, loaded in %0.3f s.',
+                 len(full), get_footprint(full)/2.**20, t2-t1)
+    texts = read_texts(args)
+    reference = get_all_segs(texts, full, args)
+    logging.info('Measuring agreement on %s hashtags.', len(texts))
+    if not os.path.exists(args.outdir):
+        os.makedirs(args.outdir)
+    counts = dict(full)
+    stem = os.path.basename(args.corpus).replace('.txt','')
+    for name, prune, level in get_levels(args):
+        kept = prune(counts, level)
+        floors = get_floors(counts, kept, full.N)
+        model = os.path.join(args.outdir,
+                             stem+'.'+name+'.q'+str(args.bits)+'.txt')
+        write_model(model, kept, full.N, args.bits, floors)
+        t1 = time.time()
+        Pw = read_model(model)
+        t2 = time.time()
+        logging.info('%s: %s words (%0.2f%% of mass), %0.1f MB on disk, '
+                     '%0.1f MB in memory, loaded in %0.3f s, %0.2f%% agreement.',
+                     model, len(Pw), 100.*sum(kept.itervalues())/\
+                     sum(counts.itervalues()), os.path.getsize(model)/2.**20,
+                     get_footprint(Pw)/2.**20, t2-t1,
+                     100.*get_agreement(reference,
+                                        get_all_segs(texts, Pw, args)))
+    logging.info('Done at '+ time.strftime("%d %b %Y %H:%M:%S", \
+                                           time.localtime()))
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,7 @@ This module contains a few housekeeping functions.
 @contact: brandon.devine@gmail.com
 @since: 8:42:57 PM on Dec 15, 2012
 '''
-import os, operator, signal, errno, time
+import os, operator, signal, errno, time, re
 from functools import wraps
 
 def read_api_key(keyfile):
@@ -56,6 +56,81 @@ def timeout(seconds=10, error_message=os.strerror(errno.ETIME)):
 
     return decorator
 
+class Budget(object):
+    '''A per-input allowance of seconds and/or operations. Unlike timeout, it is
+    polled by the caller rather than delivered by a signal, so it works from any
+    thread or pool worker and lets the caller keep the work done so far.'''
+    def __init__(self, seconds=None, ops=None):
+        self.deadline = None if seconds is None else time.time() + seconds
+        self.ops = ops
+        
+    def spend(self, n=1):
+        '''Spends n operations. Returns False once the budget has run out.'''
+        if self.ops is not None:
+            self.ops -= n
+            if self.ops < 0: return False
+        if self.deadline is not None and time.time() > self.deadline:
+            return False
+        return True
+
+def get_lattice(text, L=20):
+    '''Returns the set of words that can appear in any candidate segmentation 
+    of (hashtag) text, i.e. every substring of length <= L once the text has 
+    been normalized the way segbase and segext normalize it.'''
+    text = text.lower().replace('#', '')
+    return set(text[i:j] for i in range(len(text)) 
+               for j in range(i+1, min(len(text), i+L)+1))
+
+def get_hint_pieces(text):
+    '''Splits (hashtag) text at boundaries that are certain enough to segment 
+    either side on its own: runs of punctuation (including the hash), 
+    camelCase and acronym case changes ('SanDiego', 'NYCMarathon') and 
+    letter/digit changes next to a number of two or more digits ('Top10'), 
+    keeping an ordinal or plural ending with its number ('21stCentury'). 
+    Returns (piece, boundary) pairs, where boundary is how the piece was split 
+    from the one before it: None after punctuation or at the start, 'digit' at 
+    a letter/digit change, or 'case' at a change of case only, which the 
+    caller may rejoin ('McDonalds', 'YouTube').'''
+    #UTF-8 byte strings are split as unicode so that multi-byte characters are
+    #not taken for punctuation; other byte strings split on ASCII punctuation
+    encoding, splitter = None, r'[\W_]+'
+    if isinstance(text, str):
+        try:
+            text, encoding = text.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            splitter = r'[\x00-\x2f\x3a-\x40\x5b-\x60\x7b-\x7f]+'
+    pieces = []
+    for run in re.split(splitter, text, flags=re.UNICODE):
+        parts, prev = [], None
+        for part in re.findall(r'\d+|\D+', run):
+            digits = part if part.isdigit() else prev
+            #a single digit is too often part of a word ('mp3', '4ever')
+            if parts and len(digits) < 2:
+                parts[-1] += part
+                prev = part
+                continue
+            #an ordinal or plural ending stays with its number ('21stCentury')
+            suffix = re.match(r'st|nd|rd|th|s', part) if parts else None
+            if suffix and not part[suffix.end():suffix.end()+1].islower():
+                parts[-1] += suffix.group()
+                part = part[suffix.end():]
+            if part:
+                parts.append(part)
+            prev = part
+        for k,part in enumerate(parts):
+            start, boundary = 0, 'digit' if k else None
+            for i in range(1, len(part)):
+                if not part[i].isupper(): continue
+                #lower to upper, unless it follows a single letter ('iPhone')
+                if part[i-1].islower() and i-start >= 2 or \
+                part[i-1].isupper() and part[i+1:i+2].islower():
+                    pieces.append((part[start:i], boundary))
+                    start, boundary = i, 'case'
+            pieces.append((part[start:], boundary))
+    if encoding:
+        pieces = [(piece.encode(encoding), boundary) for piece,boundary in pieces]
+    return [(piece, boundary) for piece,boundary in pieces if piece]
+
 def get_timing(func):
     def wrapper(*arg):
         t1 = time.time()